@@ -1,5 +1,112 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from src.parser import PDFParser
+from typing import Dict, List, Optional, Tuple
+from src.parser import DocumentBatch, PDFParser
+from src.vector_store import ResearchIndex
+
+# Pages sent to the index per add_documents call, so Chroma and the embedding
+# function amortize their per-call overhead across many pages
+_BATCH_SIZE = 64
+
+# The parent holds threads (Chroma runtime, HTTP pool, embedding warmup) by
+# the time workers start, so never fork it; fall back to spawn where the
+# forkserver is unavailable (e.g. Windows)
+_MP_CONTEXT = multiprocessing.get_context(
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+
+# A file buffered for ingestion: (path, file_hash, start, end) of its pages in
+# the pending batch. start goes negative once its first pages are flushed.
+_PendingFile = Tuple[Path, str, int, int]
+
+# Per-worker parser, built once by _init_worker
+_PARSER: Optional[PDFParser] = None
+
+
+def _init_worker():
+    """
+    Builds the PDFParser (and its TextCleaner) once per worker process.
+    """
+    global _PARSER
+    _PARSER = PDFParser()
+
+
+def _process(pdf_file: Path, file_hash: str) -> DocumentBatch:
+    """
+    Parses a single PDF in a worker process.
+    """
+    documents = DocumentBatch()
+    _PARSER.parse_into(pdf_file, documents, file_hash=file_hash)
+    return documents
+
+
+def _find_new_files(pdf_files: List[Path], index: ResearchIndex) -> Dict[Path, str]:
+    """
+    Hashes every PDF and returns {path: file_hash} for those not yet in the index.
+    Files whose content is already ingested, or duplicated within this run, are skipped.
+    """
+    parser = PDFParser()
+    file_hashes: Dict[Path, str] = {}
+    for pdf_file in pdf_files:
+        try:
+            file_hashes[pdf_file] = parser.calculate_file_hash(pdf_file)
+        except OSError as e:
+            print(f"  X Failed to read {pdf_file.name}: {e}")
+
+    ingested = index.get_ingested_hashes(list(set(file_hashes.values())))
+
+    new_files: Dict[Path, str] = {}
+    seen: Dict[str, Path] = {}
+    for pdf_file, file_hash in file_hashes.items():
+        if file_hash in ingested:
+            print(f"Skipping {pdf_file.name} (already ingested)")
+        elif file_hash in seen:
+            print(f"Skipping {pdf_file.name} (same content as {seen[file_hash].name})")
+        else:
+            seen[file_hash] = pdf_file
+            new_files[pdf_file] = file_hash
+    return new_files
+
+
+def _flush(
+    index: ResearchIndex, batch: DocumentBatch, files: List[_PendingFile], final: bool = False
+) -> Tuple[DocumentBatch, List[_PendingFile]]:
+    """
+    Sends full _BATCH_SIZE slices of batch to the index (and the remainder when
+    final), marking each file ingested once the slice holding its last page is
+    stored. If a slice fails, every file with pages in it is reported, its
+    stored pages are removed and its remaining pages dropped.
+    Returns the unsent pages and their files.
+    """
+    while len(batch) >= _BATCH_SIZE or (final and len(batch)):
+        size = min(_BATCH_SIZE, len(batch))
+        consumed = size
+        try:
+            index.add_documents(batch[:size])
+        except Exception as e:
+            for pdf_file, file_hash, start, end in files:
+                if start < size:
+                    print(f"  X Failed to ingest {pdf_file.name}: {e}")
+                    consumed = max(consumed, end)
+                    try:
+                        index.remove_file(file_hash)
+                    except Exception:
+                        # Not marked as ingested, so the next run redoes it anyway
+                        pass
+        else:
+            for pdf_file, file_hash, start, end in files:
+                if end <= size:
+                    index.mark_file_ingested(file_hash)
+
+        batch = batch[consumed:]
+        files = [
+            (p, h, start - consumed, end - consumed)
+            for p, h, start, end in files if end > consumed
+        ]
+    return batch, files
+
 
 def main():
     """
@@ -7,28 +114,60 @@ def main():
     """
     base_dir = Path(__file__).parent
     data_dir = base_dir / "data"
-    
+
     if not data_dir.exists():
         print(f"Data directory not found: {data_dir}")
         return
 
     print(f"Scanning {data_dir} for PDFs...")
-    
-    parser = PDFParser()
-    
+
     pdf_files = list(data_dir.glob("*.pdf"))
     if not pdf_files:
         print("No PDF files found.")
         return
 
-    for pdf_file in pdf_files:
-        print(f"Processing {pdf_file.name}...")
-        try:
-            for document in parser.parse(pdf_file):
-                print(f"  - Extracted Page {document.page_number} (Hash: {document.metadata['id'][:8]}...)")
-                # Future: Ingest into vector DB here
-        except Exception as e:
-            print(f"  X Failed to process {pdf_file.name}: {e}")
+    index = ResearchIndex(persist_directory=str(data_dir / "chroma_db"))
+
+    # Hashing is far cheaper than parsing + embedding, so filter first
+    new_files = _find_new_files(pdf_files, index)
+    if not new_files:
+        print("All PDF files are already ingested.")
+        return
+
+    batch = DocumentBatch()
+    files: List[_PendingFile] = []
+
+    # PDFs are independent, so parse them in parallel and ingest in the parent
+    with ProcessPoolExecutor(
+        max_workers=os.cpu_count(), mp_context=_MP_CONTEXT, initializer=_init_worker
+    ) as executor:
+        futures = [
+            (pdf_file, file_hash, executor.submit(_process, pdf_file, file_hash))
+            for pdf_file, file_hash in new_files.items()
+        ]
+
+        for pdf_file, file_hash, future in futures:
+            print(f"Processing {pdf_file.name}...")
+            try:
+                documents = future.result()
+            except Exception as e:
+                print(f"  X Failed to process {pdf_file.name}: {e}")
+                continue
+
+            if not documents:
+                print("  - No text pages found")
+                index.mark_file_ingested(file_hash)
+                continue
+
+            for doc_id, page_number in zip(documents.ids, documents.metadatas_flat.get("page_number", [])):
+                print(f"  - Extracted Page {page_number} (Hash: {doc_id[:8]}...)")
+
+            # Flush full batches only; the remainder carries over to the next file
+            files.append((pdf_file, file_hash, len(batch), len(batch) + len(documents)))
+            batch.extend(documents)
+            batch, files = _flush(index, batch, files)
+
+    _flush(index, batch, files, final=True)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,91 @@
+# cython: language_level=3, boundscheck=False, wraparound=False
+"""
+Compiled helpers for TextCleaner.
+
+Build in place with: cythonize -3 -i src/_cleaner.pyx
+"""
+
+cdef extern from "Python.h":
+    object PyUnicode_New(Py_ssize_t size, Py_UCS4 maxchar)
+    Py_ssize_t PyUnicode_GET_LENGTH(object o)
+    int PyUnicode_KIND(object o)
+    void* PyUnicode_DATA(object o)
+    Py_UCS4 PyUnicode_READ(int kind, void* data, Py_ssize_t index)
+    void PyUnicode_WRITE(int kind, void* data, Py_ssize_t index, Py_UCS4 value)
+
+
+cdef enum:
+    LIG_FIRST = 0xFB00  # ff
+    LIG_LAST = 0xFB06   # st
+    CH_F = 0x66
+    CH_I = 0x69
+    CH_L = 0x6C
+    CH_S = 0x73
+    CH_T = 0x74
+
+
+cpdef str fix_ligatures(str text):
+    """
+    Expands the U+FB00..U+FB06 ligatures to their ASCII letters in one pass.
+    """
+    if text is None:
+        raise TypeError("expected str, got None")
+
+    cdef Py_ssize_t n = PyUnicode_GET_LENGTH(text)
+    cdef int kind = PyUnicode_KIND(text)
+    cdef void* data = PyUnicode_DATA(text)
+    cdef Py_ssize_t i, j = 0, out_len = 0
+    cdef Py_UCS4 c, maxchar = 0x7F  # expansions are ASCII
+    cdef bint found = False
+
+    # First pass: output length and the widest codepoint that survives, so the
+    # result is allocated with the narrowest (canonical) string kind.
+    for i in range(n):
+        c = PyUnicode_READ(kind, data, i)
+        if LIG_FIRST <= c <= LIG_LAST:
+            found = True
+            out_len += 3 if c == 0xFB03 or c == 0xFB04 else 2
+        else:
+            out_len += 1
+            if c > maxchar:
+                maxchar = c
+
+    if not found:
+        return text
+
+    out = PyUnicode_New(out_len, maxchar)
+    cdef int out_kind = PyUnicode_KIND(out)
+    cdef void* out_data = PyUnicode_DATA(out)
+
+    for i in range(n):
+        c = PyUnicode_READ(kind, data, i)
+        if c < LIG_FIRST or c > LIG_LAST:
+            PyUnicode_WRITE(out_kind, out_data, j, c)
+            j += 1
+            continue
+
+        if c == 0xFB06:
+            PyUnicode_WRITE(out_kind, out_data, j, CH_S)
+        else:
+            PyUnicode_WRITE(out_kind, out_data, j, CH_F)
+        j += 1
+
+        if c == 0xFB00:
+            PyUnicode_WRITE(out_kind, out_data, j, CH_F)
+        elif c == 0xFB01:
+            PyUnicode_WRITE(out_kind, out_data, j, CH_I)
+        elif c == 0xFB02:
+            PyUnicode_WRITE(out_kind, out_data, j, CH_L)
+        elif c == 0xFB03:
+            PyUnicode_WRITE(out_kind, out_data, j, CH_F)
+            j += 1
+            PyUnicode_WRITE(out_kind, out_data, j, CH_I)
+        elif c == 0xFB04:
+            PyUnicode_WRITE(out_kind, out_data, j, CH_F)
+            j += 1
+            PyUnicode_WRITE(out_kind, out_data, j, CH_L)
+        else:  # 0xFB05, 0xFB06
+            PyUnicode_WRITE(out_kind, out_data, j, CH_T)
+        j += 1
+
+    return out
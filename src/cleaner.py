@@ -1,4 +1,68 @@
-import re
+try:
+    # RE2 is a non-backtracking engine and noticeably faster on these simple patterns
+    import re2 as re  # type: ignore
+    _RE2 = True
+except ImportError:
+    import re
+    _RE2 = False
+
+try:
+    # Optional compiled ligature expansion, built with `cythonize -3 -i src/_cleaner.pyx`
+    from src._cleaner import fix_ligatures as _fix_ligatures_compiled  # type: ignore
+except ImportError:
+    _fix_ligatures_compiled = None
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Common ligatures mapping, applied in a single str.translate pass
+_LIGATURE_TABLE = str.maketrans({
+    "ﬁ": "fi",
+    "ﬂ": "fl",
+    "ﬀ": "ff",
+    "ﬃ": "ffi",
+    "ﬄ": "ffl",
+    "ﬅ": "ft",
+    "ﬆ": "st",
+})
+
+# Vectorized ligature expansion is only worth its setup cost on very large pages
+_VECTORIZE_MIN_CHARS = 50_000
+
+if np is not None:
+    # Expansions of U+FB00..U+FB06 (same order as the codepoints), NUL-padded to 3
+    _LIGATURE_EXPANSIONS = np.array(
+        [[ord(c) for c in rep.ljust(3, "\0")] for rep in ("ff", "fi", "fl", "ffi", "ffl", "ft", "st")],
+        dtype=np.uint32,
+    )
+    _LIGATURE_LENGTHS = np.array([2, 2, 2, 3, 3, 2, 2], dtype=np.intp)
+
+# Every line boundary str.splitlines() recognizes, mapped to "\n" so the
+# multiline patterns below see PDF form feeds, CRs, etc. as line breaks
+_LINE_BREAK_TABLE = str.maketrans(dict.fromkeys("\r\v\f\x1c\x1d\x1e\x85\u2028\u2029", "\n"))
+
+# RE2's \s and \d are ASCII-only, so spell out the Unicode classes stdlib re
+# uses for str patterns (whitespace per str.isspace(), decimal digits)
+if _RE2:
+    _SPACE = r"[\s\v\x1c-\x1f\x85\p{Z}]"
+    _LINE_SPACE = r"[\t\v\f\r\x1c-\x1f\x85\p{Z}]"  # whitespace except "\n"
+    _DIGIT = r"\p{Nd}"
+else:
+    _SPACE = r"\s"
+    _LINE_SPACE = r"[^\S\n]"
+    _DIGIT = r"\d"
+
+# Patterns use inline flags only, so they compile unchanged under both engines
+
+# Hyphenated line break, e.g. "communi-\ncation"
+_HYPHEN_RE = re.compile(rf"-\n{_SPACE}*")
+_WS_RE = re.compile(rf"{_SPACE}+")
+# Whole lines that are just a page number or a "Page X of Y" header/footer
+_ARTIFACT_LINE_RE = re.compile(
+    rf"(?im)^{_LINE_SPACE}*(?:{_DIGIT}+|Page {_DIGIT}+ of {_DIGIT}+){_LINE_SPACE}*$"
+)
 
 
 class TextCleaner:
@@ -28,67 +92,54 @@ class TextCleaner:
         """
         Fixes common broken ligatures found in PDFs.
         """
-        # Common ligatures mapping
-        ligatures = {
-            "ﬁ": "fi",
-            "ﬂ": "fl",
-            "ﬀ": "ff",
-            "ﬃ": "ffi",
-            "ﬄ": "ffl",
-            "ﬅ": "ft",
-            "ﬆ": "st",
-        }
-        for lig, rep in ligatures.items():
-            text = text.replace(lig, rep)
-        return text
+        if _fix_ligatures_compiled is not None:
+            return _fix_ligatures_compiled(text)
+
+        if np is not None and len(text) > _VECTORIZE_MIN_CHARS:
+            return self._fix_ligatures_vectorized(text)
+
+        return text.translate(_LIGATURE_TABLE)
+
+    def _fix_ligatures_vectorized(self, text: str) -> str:
+        """
+        numpy variant of _fix_ligatures for very large pages: works on the
+        UTF-32 codepoint array instead of the Python string.
+        """
+        codepoints = np.frombuffer(text.encode("utf-32-le", "surrogatepass"), dtype=np.uint32)
+        # Offsets into the ligature block; codepoints below U+FB00 wrap around to huge values
+        offsets = codepoints - np.uint32(0xFB00)
+        is_ligature = offsets <= 6
+        if not is_ligature.any():
+            return text
+
+        ligatures = offsets[is_ligature]
+        lengths = _LIGATURE_LENGTHS[ligatures]
+
+        # Repeat each ligature once per output letter, then overwrite with the expansion
+        counts = np.ones(len(codepoints), dtype=np.intp)
+        counts[is_ligature] = lengths
+        expanded = np.repeat(codepoints, counts)
+        starts = (np.cumsum(counts) - counts)[is_ligature]
+        for k in range(3):
+            selected = lengths > k
+            expanded[starts[selected] + k] = _LIGATURE_EXPANSIONS[ligatures[selected], k]
+
+        return expanded.tobytes().decode("utf-32-le", "surrogatepass")
 
     def _normalize_whitespace(self, text: str) -> str:
         """
         Normalizes whitespace:
-        - Replaces multiple spaces with single space.
-        - Handles hyphenation at line breaks.
+        - Handles hyphenation at line breaks (e.g., "communi-\\ncation" -> "communication").
+        - Collapses all whitespace (including newlines) into single spaces.
         """
-        # Fix hyphenation (e.g., "communi-\ncation" -> "communication")
-        text = re.sub(r"-\n\s*", "", text)
-        
-        # Replace multiple whitespace (including newlines) with single space
-        # Note: Depending on downstream needs, we might want to keep paragraph breaks.
-        # For now, we'll normalize to single spaces to form continuous text, 
-        # but let's preserve double newlines as paragraph breaks if needed.
-        # The requirement says "normalizing whitespace".
-        # Let's collapse all whitespace to single space for RAG chunks usually, 
-        # or keep \n for structure. Let's do standard normalization.
-        text = re.sub(r"\s+", " ", text)
-        return text.strip()
+        return _WS_RE.sub(" ", _HYPHEN_RE.sub("", text)).strip()
 
     def _remove_artifacts(self, text: str) -> str:
         """
         Removes common artifacts like page numbers and headers/footers.
         Note: This is heuristic-based and might not catch everything without layout info.
+        Must run before _normalize_whitespace, since it relies on line breaks.
         """
-        # Remove standalone page numbers (e.g., " 1 ", "Page 1 of 10")
-        # Matches "Page X" or "Page X of Y" or just digits on a line (if we had lines)
-        # Since we might have already normalized newlines in a different order, 
-        # it's safer to run this before whitespace normalization if we relied on \n.
-        # But here I'm calling it before _normalize_whitespace in clean_text, 
-        # so newlines are still present.
-        
-        lines = text.split('\n')
-        cleaned_lines = []
-        for line in lines:
-            stripped = line.strip()
-            # Skip empty lines
-            if not stripped:
-                continue
-            
-            # Heuristic: Skip if line is just a number (page number)
-            if re.match(r'^\d+$', stripped):
-                continue
-                
-            # Heuristic: Skip common header/footer patterns
-            if re.match(r'^Page \d+ of \d+$', stripped, re.IGNORECASE):
-                continue
-            
-            cleaned_lines.append(line)
-            
-        return '\n'.join(cleaned_lines)
+        text = text.translate(_LINE_BREAK_TABLE)
+        # rstrip so a hyphen on the last line is not joined with nothing
+        return _ARTIFACT_LINE_RE.sub("", text).rstrip()
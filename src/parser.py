@@ -1,11 +1,26 @@
-import hashlib
+import mmap
 import fitz  # type: ignore
+from blake3 import blake3  # type: ignore
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 from pathlib import Path
 from dataclasses import dataclass, field
-from typing import Iterator, Dict, Any, Optional
+from typing import Iterator, Dict, Any, List, Optional, Tuple
 
 from src.cleaner import TextCleaner
 
+# Default text flags minus PRESERVE_LIGATURES / PRESERVE_WHITESPACE, so MuPDF
+# expands ligatures and maps exotic whitespace to spaces in C. TEXT_DEHYPHENATE
+# is left out: PyMuPDF only applies it to text search, not to plain extraction.
+_TEXT_FLAGS = fitz.TEXT_MEDIABOX_CLIP | fitz.TEXT_CID_FOR_UNKNOWN_UNICODE
+
+# Pages shorter than this, or with no letters near the start, are treated as
+# blank / figure-only and skipped before cleaning
+_MIN_PAGE_CHARS = 20
+_ALPHA_PROBE_CHARS = 200
+
+# Background threads for file hashing, so it overlaps with PDF parsing
+_HASH_POOL = ThreadPoolExecutor(max_workers=2)
+
 
 @dataclass
 class Document:
@@ -24,6 +39,60 @@ class Document:
         return self.metadata.get("page_number", -1)
 
 
+@dataclass
+class DocumentBatch:
+    """
+    Column-oriented collection of processed pages.
+
+    Holds one list per field instead of a Document and metadata dict per page;
+    per-page metadata dicts are only built at the vector store boundary.
+    """
+    ids: List[str] = field(default_factory=list)
+    contents: List[str] = field(default_factory=list)
+    metadatas_flat: Dict[str, List[Any]] = field(default_factory=dict)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __getitem__(self, index: slice) -> "DocumentBatch":
+        """
+        Returns the pages in a slice as a new batch.
+        """
+        return DocumentBatch(
+            ids=self.ids[index],
+            contents=self.contents[index],
+            metadatas_flat={key: values[index] for key, values in self.metadatas_flat.items()},
+        )
+
+    def append(self, doc_id: str, content: str, **metadata: Any):
+        """
+        Appends a single page, given as column values.
+        """
+        self.ids.append(doc_id)
+        self.contents.append(content)
+        for key, value in metadata.items():
+            self.metadatas_flat.setdefault(key, []).append(value)
+
+    def extend(self, other: "DocumentBatch"):
+        """
+        Appends all pages of another batch.
+        """
+        self.ids.extend(other.ids)
+        self.contents.extend(other.contents)
+        for key, values in other.metadatas_flat.items():
+            self.metadatas_flat.setdefault(key, []).extend(values)
+
+    def metadatas(self) -> List[Dict[str, Any]]:
+        """
+        Rebuilds per-page metadata dicts (including the page id), as stored by Document.
+        """
+        columns = self.metadatas_flat
+        return [
+            {**{key: values[i] for key, values in columns.items()}, "id": self.ids[i]}
+            for i in range(len(self.ids))
+        ]
+
+
 class PDFParser:
     """
     Handles ingestion of PDF documents using PyMuPDF.
@@ -32,12 +101,13 @@ class PDFParser:
     def __init__(self, cleaner: Optional[TextCleaner] = None):
         self.cleaner = cleaner or TextCleaner()
 
-    def parse(self, file_path: Path) -> Iterator[Document]:
+    def parse(self, file_path: Path, file_hash: Optional[str] = None) -> Iterator[Document]:
         """
         Parses a PDF file and yields Document objects (one per page).
 
         Args:
             file_path: Path to the PDF file.
+            file_hash: Precomputed calculate_file_hash() result, if already known.
 
         Yields:
             Document objects containing cleaned text and metadata.
@@ -46,52 +116,137 @@ class PDFParser:
             FileNotFoundError: If file does not exist.
             ValueError: If file is not a PDF.
         """
+        filename = file_path.name
+        absolute_path = str(file_path.absolute())
+
+        for page_num, cleaned_text, file_hash in self._extract_pages(file_path, file_hash):
+            metadata = {
+                "filename": filename,
+                "file_path": absolute_path,
+                "page_number": page_num + 1,  # 1-based indexing for humans
+                "file_hash": file_hash,
+                "id": self._page_id(file_hash, page_num)
+            }
+
+            yield Document(content=cleaned_text, metadata=metadata)
+
+    def parse_into(self, file_path: Path, batch: DocumentBatch, file_hash: Optional[str] = None) -> int:
+        """
+        Parses a PDF file and appends its pages to a DocumentBatch.
+
+        Same as parse(), but stores pages column-wise instead of creating
+        a Document per page.
+
+        Args:
+            file_path: Path to the PDF file.
+            batch: Batch the pages are appended to.
+            file_hash: Precomputed calculate_file_hash() result, if already known.
+
+        Returns:
+            Number of pages appended.
+
+        Raises:
+            FileNotFoundError: If file does not exist.
+            ValueError: If file is not a PDF.
+        """
+        filename = file_path.name
+        absolute_path = str(file_path.absolute())
+        count = 0
+
+        for page_num, cleaned_text, file_hash in self._extract_pages(file_path, file_hash):
+            batch.append(
+                self._page_id(file_hash, page_num),
+                cleaned_text,
+                filename=filename,
+                file_path=absolute_path,
+                page_number=page_num + 1,
+                file_hash=file_hash,
+            )
+            count += 1
+
+        return count
+
+    def _extract_pages(self, file_path: Path, file_hash: Optional[str] = None) -> Iterator[Tuple[int, str, str]]:
+        """
+        Yields (0-based page number, cleaned text, file hash) for each non-empty page.
+        """
         if not file_path.exists():
             raise FileNotFoundError(f"File not found: {file_path}")
         
         if file_path.suffix.lower() != ".pdf":
             raise ValueError(f"File is not a PDF: {file_path}")
 
-        # Calculate file hash for deduplication
-        file_hash = self._calculate_file_hash(file_path)
-        filename = file_path.name
-
+        # Map the file once and share the buffer between hashing and MuPDF,
+        # so the PDF is read from disk a single time
         try:
-            doc = fitz.open(file_path)
-        except Exception as e:
+            with open(file_path, "rb") as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
             raise ValueError(f"Failed to open PDF {file_path}: {e}")
 
-        for page_num, page in enumerate(doc):
-            # Extract text
-            raw_text = page.get_text()
-            
-            # Clean text
-            cleaned_text = self.cleaner.clean_text(raw_text)
-            
-            # Skip empty pages
-            if not cleaned_text:
-                continue
+        view = memoryview(mm)
+        # Calculate file hash for deduplication in the background; both hashing
+        # and MuPDF release the GIL, so this overlaps with page extraction
+        if file_hash is None:
+            hash_future = _HASH_POOL.submit(self._hash_buffer, view)
+        else:
+            hash_future = Future()
+            hash_future.set_result(file_hash)
 
-            metadata = {
-                "filename": filename,
-                "file_path": str(file_path.absolute()),
-                "page_number": page_num + 1,  # 1-based indexing for humans
-                "file_hash": file_hash,
-                # Create a unique ID for this page: hash of (file_hash + page)
-                "id": hashlib.sha256(f"{file_hash}_{page_num}".encode()).hexdigest()
-            }
+        try:
+            try:
+                doc = fitz.open(stream=view, filetype="pdf")
+            except Exception as e:
+                raise ValueError(f"Failed to open PDF {file_path}: {e}")
 
-            yield Document(content=cleaned_text, metadata=metadata)
-        
-        doc.close()
+            try:
+                for page_num, page in enumerate(doc):
+                    # Extract text
+                    raw_text = page.get_text("text", flags=_TEXT_FLAGS)
+
+                    # Skip blank or figure-only pages without running the cleaner
+                    if len(raw_text) < _MIN_PAGE_CHARS or not any(c.isalpha() for c in raw_text[:_ALPHA_PROBE_CHARS]):
+                        continue
+
+                    # Clean text
+                    cleaned_text = self.cleaner.clean_text(raw_text)
+
+                    # Skip empty pages
+                    if not cleaned_text:
+                        continue
+
+                    yield page_num, cleaned_text, hash_future.result()
+            finally:
+                doc.close()
+        finally:
+            # The mapping can only be closed once nothing is reading from it
+            wait([hash_future])
+            view.release()
+            mm.close()
+
+    @staticmethod
+    def _page_id(file_hash: str, page_num: int) -> str:
+        """
+        Creates a unique ID for a page from (file_hash, page).
+        The file hash is already unique per file, so no second hash is needed;
+        its first 128 bits are plenty for deduplication.
+        """
+        return f"{file_hash[:32]}:{page_num}"
+
+    def calculate_file_hash(self, file_path: Path) -> str:
+        """
+        Calculates BLAKE3 hash of the file content.
+
+        The hash is only used as a content ID for deduplication, not for
+        security, so a fast SIMD/multithreaded hash is preferred over SHA-256.
+        """
+        file_hash = blake3(max_threads=blake3.AUTO)
+        file_hash.update_mmap(file_path)
+        return file_hash.hexdigest()
 
-    def _calculate_file_hash(self, file_path: Path) -> str:
+    @staticmethod
+    def _hash_buffer(buffer: memoryview) -> str:
         """
-        Calculates SHA-256 hash of the file content.
+        Same as calculate_file_hash, for file content that is already in memory.
         """
-        sha256_hash = hashlib.sha256()
-        with open(file_path, "rb") as f:
-            # Read in chunks to handle large files
-            for byte_block in iter(lambda: f.read(4096), b""):
-                sha256_hash.update(byte_block)
-        return sha256_hash.hexdigest()
+        return blake3(buffer, max_threads=blake3.AUTO).hexdigest()
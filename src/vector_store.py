@@ -1,24 +1,186 @@
-from typing import List, Dict, Any, Optional
+import os
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Set, Tuple, Union
 import chromadb
 from chromadb.api import ClientAPI
 from chromadb.utils import embedding_functions
-import ollama
-from src.parser import Document
+import diskcache  # type: ignore
+import httpx
+from blake3 import blake3  # type: ignore
+from src.parser import Document, DocumentBatch
+
+# Keeps two embed requests in flight, so HTTP and tokenization of one batch
+# overlap with the server embedding the other
+_EMBED_POOL = ThreadPoolExecutor(max_workers=2)
 
 class OllamaEmbeddingFunction(chromadb.EmbeddingFunction):
     """
     Custom embedding function using Ollama's API.
     """
-    def __init__(self, model_name: str = "nomic-embed-text"):
+    def __init__(
+        self,
+        model_name: str = "nomic-embed-text",
+        batch_size: int = 32,
+        host: Optional[str] = None,
+        warmup: bool = True,
+        cache_dir: Optional[str] = "data/embed_cache",
+    ):
+        """
+        Args:
+            model_name: Ollama embedding model to use.
+            batch_size: Maximum number of texts sent per /api/embed request.
+                32 is safe for CPU servers; GPU (CUDA) servers can take 128.
+            host: Ollama server URL. Defaults to $OLLAMA_HOST or localhost.
+            warmup: Load the model on the server in the background right away,
+                so the first real request does not pay for it.
+            cache_dir: Directory of the on-disk LRU cache of embeddings, keyed
+                by (model, content hash). None disables caching.
+        """
         self.model_name = model_name
+        self.batch_size = batch_size
+        # Set once the server turns out not to support /api/embed
+        self._legacy_api = False
+
+        host = host or os.environ.get("OLLAMA_HOST", "http://localhost:11434")
+        if "://" not in host:
+            host = f"http://{host}"
+        self.base_url = host.rstrip("/")
+
+        # One pooled keep-alive session for every request. Limits must be set
+        # on the transport since httpx ignores client limits when a transport is given.
+        self._session = httpx.Client(
+            transport=httpx.HTTPTransport(
+                retries=3,
+                http2=True,
+                limits=httpx.Limits(
+                    max_keepalive_connections=40,
+                    max_connections=100,
+                    keepalive_expiry=30.0,
+                ),
+            ),
+            timeout=httpx.Timeout(300.0, connect=10.0),
+        )
+
+        self._cache = None
+        if cache_dir is not None:
+            self._cache = diskcache.Cache(cache_dir, eviction_policy="least-recently-used")
+
+        if warmup:
+            threading.Thread(target=self._warmup, daemon=True).start()
 
     def __call__(self, input: List[str]) -> List[List[float]]:
+        if self._cache is None:
+            return self._embed(input)
+
+        keys = [self._cache_key(text) for text in input]
+        embeddings = [self._cache.get(key) for key in keys]
+
+        # Only embed texts not in the cache, each distinct text once
+        missing: Dict[Tuple[str, str], List[int]] = {}
+        for i, (key, embedding) in enumerate(zip(keys, embeddings)):
+            if embedding is None:
+                missing.setdefault(key, []).append(i)
+
+        if missing:
+            missing_keys = list(missing)
+            fresh = self._embed([input[missing[key][0]] for key in missing_keys])
+            for key, embedding in zip(missing_keys, fresh):
+                self._cache.set(key, embedding)
+                for i in missing[key]:
+                    embeddings[i] = embedding
+
+        return embeddings
+
+    def _cache_key(self, text: str) -> Tuple[str, str]:
+        return (self.model_name, blake3(text.encode()).hexdigest())
+
+    def _embed(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embeds texts through the server, in sub-batches of batch_size.
+        """
+        batches = [texts[start:start + self.batch_size] for start in range(0, len(texts), self.batch_size)]
+        if len(batches) > 1:
+            # Pipeline sub-batches; map() keeps results in input order
+            results = _EMBED_POOL.map(self._embed_batch, batches)
+        else:
+            results = map(self._embed_batch, batches)
+
         embeddings = []
-        for text in input:
-            response = ollama.embeddings(model=self.model_name, prompt=text)
-            embeddings.append(response["embedding"])
+        for batch_embeddings in results:
+            embeddings.extend(batch_embeddings)
         return embeddings
 
+    def _warmup(self):
+        """
+        Issues a tiny embed request so the server loads the model.
+        Failures are ignored; real requests report their own errors.
+        """
+        try:
+            self._post("/api/embed", {"model": self.model_name, "input": [""]})
+        except Exception:
+            # HTTP errors, a non-JSON reply, or the session closed mid-request
+            pass
+
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embeds a batch of texts with a single /api/embed request.
+        Falls back to the legacy per-text endpoint on servers that do not
+        return batched embeddings (older Ollama answers /api/embed with 404).
+        """
+        if not self._legacy_api:
+            try:
+                response = self._post("/api/embed", {"model": self.model_name, "input": texts})
+            except httpx.HTTPStatusError as e:
+                if not self._is_missing_endpoint(e.response):
+                    raise
+                self._legacy_api = True
+            else:
+                embeddings = response.get("embeddings")
+                if embeddings:
+                    return embeddings
+
+        return [
+            self._post("/api/embeddings", {"model": self.model_name, "prompt": text})["embedding"]
+            for text in texts
+        ]
+
+    @staticmethod
+    def _is_missing_endpoint(response: httpx.Response) -> bool:
+        """
+        True if the server has no such route (older Ollama's plain-text
+        "404 page not found"), as opposed to an Ollama JSON error such as
+        a model that has not been pulled, which is also a 404.
+        """
+        if response.status_code not in (404, 405):
+            return False
+        try:
+            body = response.json()
+        except ValueError:
+            return True
+        return not (isinstance(body, dict) and "error" in body)
+
+    def _post(self, endpoint: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        response = self._session.post(f"{self.base_url}{endpoint}", json=payload)
+        response.raise_for_status()
+        return response.json()
+
+    def close(self):
+        """
+        Releases the pooled HTTP connections and the embedding cache.
+        """
+        session = getattr(self, "_session", None)
+        if session is not None:
+            session.close()
+
+        cache = getattr(self, "_cache", None)
+        if cache is not None:
+            cache.close()
+
+    def __del__(self):
+        self.close()
+
 class ResearchIndex:
     """
     Manages the vector store for research documents.
@@ -28,29 +190,81 @@ class ResearchIndex:
         Initialize the ChromaDB client and collection.
         """
         self.client = chromadb.PersistentClient(path=persist_directory)
-        self.embedding_fn = OllamaEmbeddingFunction()
+        self.collection_name = collection_name
+        # Keep the embedding cache inside this index's Chroma directory
+        self.embedding_fn = OllamaEmbeddingFunction(
+            cache_dir=os.path.join(persist_directory, "embed_cache")
+        )
         self.collection = self.client.get_or_create_collection(
             name=collection_name,
             embedding_function=self.embedding_fn
         )
 
-    def add_documents(self, documents: List[Document]):
+        # Hashes of files whose pages are all stored (or that had none). Pages
+        # alone cannot tell a fully ingested file from a partially flushed one.
+        # Kept inside the Chroma directory and keyed by collection, like the pages.
+        self._ingested_files = sqlite3.connect(
+            os.path.join(persist_directory, "ingested_files.sqlite3")
+        )
+        with self._ingested_files:
+            self._ingested_files.execute(
+                "CREATE TABLE IF NOT EXISTS ingested_files ("
+                "collection TEXT NOT NULL, file_hash TEXT NOT NULL, "
+                "PRIMARY KEY (collection, file_hash))"
+            )
+
+    def add_documents(self, documents: Union[DocumentBatch, List[Document]]):
         """
-        Adds Document objects to the collection.
+        Adds a DocumentBatch or a list of Document objects to the collection.
         """
         if not documents:
             return
 
-        ids = [doc.metadata["id"] for doc in documents]
-        documents_content = [doc.content for doc in documents]
-        metadatas = [doc.metadata for doc in documents]
+        if isinstance(documents, DocumentBatch):
+            ids = documents.ids
+            documents_content = documents.contents
+            metadatas = documents.metadatas()
+        else:
+            ids = [doc.metadata["id"] for doc in documents]
+            documents_content = [doc.content for doc in documents]
+            metadatas = [doc.metadata for doc in documents]
 
-        self.collection.add(
+        # upsert, so re-ingesting a partially stored file just overwrites its pages
+        self.collection.upsert(
             ids=ids,
             documents=documents_content,
             metadatas=metadatas
         )
 
+    def get_ingested_hashes(self, file_hashes: List[str]) -> Set[str]:
+        """
+        Returns the subset of file_hashes recorded by mark_file_ingested.
+        """
+        return {
+            file_hash
+            for file_hash in set(file_hashes)
+            if self._ingested_files.execute(
+                "SELECT 1 FROM ingested_files WHERE collection = ? AND file_hash = ?",
+                (self.collection_name, file_hash),
+            ).fetchone()
+        }
+
+    def mark_file_ingested(self, file_hash: str):
+        """
+        Records a file once all of its pages are stored, so later runs skip it.
+        """
+        with self._ingested_files:
+            self._ingested_files.execute(
+                "INSERT OR IGNORE INTO ingested_files (collection, file_hash) VALUES (?, ?)",
+                (self.collection_name, file_hash),
+            )
+
+    def remove_file(self, file_hash: str):
+        """
+        Deletes every stored page of a file.
+        """
+        self.collection.delete(where={"file_hash": file_hash})
+
     def search(self, query: str, n_results: int = 3) -> Dict[str, Any]:
         """
         Search the collection for relevant documents.